@@ -1,93 +1,128 @@
+import asyncio
 import os
 import uuid
-from typing import List, Dict, Any
-from backend.document_parser import parse_pdf
+from typing import List, Dict, Any, Optional
+from backend.document_parser import DocumentChunk
 import chromadb
+from chromadb.utils.batch_utils import create_batches
 from openai import AsyncOpenAI
 from backend.models import File
 
 
 FILE_COLLECTION_NAME = "files"
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_BATCH_SIZE = 256
+
+
+# Shared clients, reused across calls so connections are pooled
+openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+chroma_client = None
+file_collection = None
 
 
 async def get_chromadb_client():
-    client = chromadb.HttpClient(host="chroma", port=8000)
-    return client
+    global chroma_client
+    if chroma_client is None:
+        chroma_client = await asyncio.to_thread(
+            chromadb.HttpClient, host="chroma", port=8000
+        )
+    return chroma_client
+
+
+async def get_file_collection():
+    global file_collection
+    if file_collection is None:
+        client = await get_chromadb_client()
+        file_collection = await asyncio.to_thread(
+            client.get_or_create_collection, FILE_COLLECTION_NAME
+        )
+    return file_collection
 
 
-async def add_file_to_chromadb(file: File, file_path: str):
+async def add_file_to_chromadb(
+    file: File,
+    chunks: List[DocumentChunk],
+    chunk_indices: Optional[List[int]] = None,
+) -> List[str]:
     """
-    Add a file to ChromaDB for vector search
+    Add a file's parsed chunks to ChromaDB for vector search. Chunks are
+    upserted, so adding the same chunks again is safe.
 
     Args:
         file: The File object from the database
-        file_path: Path to the file on disk
+        chunks: The parsed chunks of the file
+        chunk_indices: Position of each chunk within the file, used to build
+            its ID. Defaults to 0..len(chunks) - 1
+
+    Returns:
+        The ChromaDB IDs of the added chunks
     """
-    openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    chroma_client = await get_chromadb_client()
-    collection = chroma_client.get_or_create_collection(FILE_COLLECTION_NAME)
-
-    # Read the file content
-    with open(file_path, "rb") as f:
-        file_content = f.read()
-
-    # Parse the document
-    parsed = None
-    if file.content_type == "application/pdf":
-        parsed = await parse_pdf(
-            file_content
-        )  # HOMEWORK: Try and compare page-level chunks vs. block-level chunks
-    else:
-        # For non-PDF files, we can add support later
-        return
-
-    # Process in batches for better performance
-    batch_size = 100
-    batched_ids = []
-    batched_embeddings = []
-    batched_documents = []
-    batched_metadata = []
-
-    for i, chunk in enumerate(parsed.chunks):
-        # Get embedding from OpenAI
+    if not chunks:
+        return []
+
+    if chunk_indices is None:
+        chunk_indices = list(range(len(chunks)))
+
+    client = await get_chromadb_client()
+    collection = await get_file_collection()
+
+    # Embed chunks in batches, one OpenAI request per batch
+    embeddings = []
+    for start in range(0, len(chunks), EMBEDDING_BATCH_SIZE):
+        batch = chunks[start : start + EMBEDDING_BATCH_SIZE]
         embedding_response = await openai_client.embeddings.create(
-            input=chunk.embed,  # HOMEWORK: Try and compare using chunk.embed vs. chunk.content
-            model="text-embedding-3-small",
+            input=[
+                chunk.embed for chunk in batch
+            ],  # HOMEWORK: Try and compare using chunk.embed vs. chunk.content
+            model=EMBEDDING_MODEL,
         )
-        embedding_vector = embedding_response.data[0].embedding
+        embeddings.extend(item.embedding for item in embedding_response.data)
 
-        # Create metadata
-        metadata = {
+    ids = [f"{file.id}_{i}" for i in chunk_indices]
+    documents = [chunk.content for chunk in chunks]
+    metadatas = [
+        {
             "file_id": str(file.id),
             "file_name": file.name,
             "page_number": chunk.metadata.get("page_num", 0),
             "user_id": str(file.user_id),
         }
+        for chunk in chunks
+    ]
+
+    # Add in batches no larger than the server's max batch size. Looking up
+    # the max batch size is an HTTP request, so keep it off the event loop.
+    batches = await asyncio.to_thread(
+        create_batches,
+        api=client,
+        ids=ids,
+        embeddings=embeddings,
+        metadatas=metadatas,
+        documents=documents,
+    )
+    for batch_ids, batch_embeddings, batch_metadatas, batch_documents in batches:
+        await asyncio.to_thread(
+            collection.upsert,
+            ids=batch_ids,
+            embeddings=batch_embeddings,
+            metadatas=batch_metadatas,
+            documents=batch_documents,
+        )
 
-        batched_ids.append(f"{file.id}_{i}")
-        batched_embeddings.append(embedding_vector)
-        batched_documents.append(chunk.content)
-        batched_metadata.append(metadata)
-
-        # Add in batches
-        if len(batched_ids) >= batch_size or i == len(parsed.chunks) - 1:
-            collection.add(
-                ids=batched_ids,
-                embeddings=batched_embeddings,
-                documents=batched_documents,
-                metadatas=batched_metadata,
-            )
-            # Clear batches
-            batched_ids = []
-            batched_embeddings = []
-            batched_documents = []
-            batched_metadata = []
+    return ids
 
 
-async def delete_file_from_chromadb(file_id: uuid.UUID):
-    chroma_client = await get_chromadb_client()
-    collection = chroma_client.get_or_create_collection(FILE_COLLECTION_NAME)
-    collection.delete(where={"file_id": str(file_id)})
+async def delete_file_from_chromadb(file_id: uuid.UUID, user_id: uuid.UUID):
+    collection = await get_file_collection()
+    await asyncio.to_thread(
+        collection.delete,
+        where={
+            "$and": [
+                {"file_id": str(file_id)},
+                {"user_id": str(user_id)},
+            ]
+        },
+    )
 
 
 async def search_vector_db(
@@ -104,22 +139,21 @@ async def search_vector_db(
     Returns:
         List of relevant chunks with metadata
     """
-    openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    chroma_client = await get_chromadb_client()
-    collection = chroma_client.get_or_create_collection(FILE_COLLECTION_NAME)
+    collection = await get_file_collection()
 
     # HOMEWORK: Try query enrichment techniques
 
     # Get embedding for the query
     embedding_response = await openai_client.embeddings.create(
-        input=query, model="text-embedding-3-small"
+        input=query, model=EMBEDDING_MODEL
     )
     query_embedding = embedding_response.data[0].embedding
 
     # Search the collection
     where_clause = {"user_id": str(user_id)} if user_id else None
 
-    results = collection.query(
+    results = await asyncio.to_thread(
+        collection.query,
         query_embeddings=[query_embedding],
         n_results=top_k,
         where=where_clause,
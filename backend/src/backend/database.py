@@ -2,11 +2,30 @@ from typing import Annotated
 
 from fastapi import Depends
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
-engine = create_engine("postgresql://pguser:pgpassword@db:5432/postgres")
+engine = create_engine(
+    "postgresql://pguser:pgpassword@db:5432/postgres",
+    # Cache compiled SQL for repeated query shapes across requests
+    query_cache_size=1200,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for work that runs on the event loop outside a request, such as
+# background tasks. Sized to the background indexer, which runs at most four
+# files at a time (INDEX_SEMAPHORE in routers/file.py) with one short-lived
+# session each.
+async_engine = create_async_engine(
+    "postgresql+asyncpg://pguser:pgpassword@db:5432/postgres",
+    pool_size=4,
+    max_overflow=0,
+    query_cache_size=1200,
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 class Base(DeclarativeBase):
     pass
 
@@ -1,8 +1,10 @@
 import asyncio
 import base64
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
+import multiprocessing
 import os
-from typing import Any, Dict, List, Literal
+from typing import Any, Dict, List, Literal, Union
 
 from openai import AsyncOpenAI
 
@@ -13,6 +15,14 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Worker processes for CPU-bound PDF loading and page rendering, started and
+# shut down by the app lifespan
+PARSE_POOL_MAX_WORKERS = min(4, os.cpu_count() or 1)
+parse_pool: ProcessPoolExecutor | None = None
+
+# Shared client, reused across calls so connections are pooled
+openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
 
 class BlockType(str, Enum):
     """
@@ -158,22 +168,27 @@ class ParsedDocument(BaseModel):
     )
 
 
-async def load_pdf(bytes: bytes) -> ParsedDocument:
+def load_pdf(source: Union[bytes, str]) -> pymupdf.Document:
     """
-    Load a PDF document from bytes.
+    Load a PDF document from bytes or a file path.
 
     Converts raw binary PDF data into a structured document object that can
-    be parsed for content extraction.
+    be parsed for content extraction. Opening from a path lets PyMuPDF read
+    the file directly without first copying it into a Python bytes object.
 
     Args:
-        bytes: Raw binary data of the PDF document
+        source: Raw binary data of the PDF document, or a path to it on disk
 
     Returns:
         A pymupdf.Document object representing the loaded document
     """
-    logger.info("Loading PDF document from bytes")
     try:
-        doc = pymupdf.open(stream=bytes, filetype="pdf")
+        if isinstance(source, str):
+            logger.info(f"Loading PDF document from {source}")
+            doc = pymupdf.open(source, filetype="pdf")
+        else:
+            logger.info("Loading PDF document from bytes")
+            doc = pymupdf.open(stream=source, filetype="pdf")
         logger.info(f"Successfully loaded PDF with {len(doc)} pages")
         return doc
     except Exception as e:
@@ -181,7 +196,7 @@ async def load_pdf(bytes: bytes) -> ParsedDocument:
         raise
 
 
-async def extract_page_data(
+def extract_page_data(
     document: pymupdf.Document,
 ) -> List[Dict[str, str]]:
     """
@@ -223,6 +238,43 @@ async def extract_page_data(
     return page_data
 
 
+def load_pdf_page_data(source: Union[bytes, str]) -> List[Dict[str, str]]:
+    """
+    Load a PDF document and extract text and images from each page.
+
+    This is the CPU-bound part of parsing, kept synchronous so it can run in
+    parse_pool instead of on the event loop.
+
+    Args:
+        source: Raw binary data of the PDF document, or a path to it on disk
+
+    Returns:
+        A list of dictionaries containing text and image for each page
+    """
+    document = load_pdf(source)
+    return extract_page_data(document)
+
+
+def start_parse_pool():
+    """Start the worker processes used to load and render PDFs"""
+    global parse_pool
+    if parse_pool is None:
+        # Fork a clean server process instead of the app process, which by now
+        # has threads and open sockets that a plain fork would copy
+        parse_pool = ProcessPoolExecutor(
+            max_workers=PARSE_POOL_MAX_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+
+
+def shutdown_parse_pool():
+    """Stop the PDF worker processes, dropping any queued work"""
+    global parse_pool
+    if parse_pool is not None:
+        parse_pool.shutdown(wait=False, cancel_futures=True)
+        parse_pool = None
+
+
 async def analyze_page_with_openai(
     client: AsyncOpenAI,
     page_num: int,
@@ -321,8 +373,6 @@ async def analyze_with_openai(
     Returns:
         List of DocumentBlock objects
     """
-    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
     all_blocks = []
 
     # Process pages in batches to control concurrency
@@ -331,7 +381,7 @@ async def analyze_with_openai(
     async def process_page_with_semaphore(page):
         async with semaphore:
             return await analyze_page_with_openai(
-                client=client,
+                client=openai_client,
                 page_num=page["page_num"],
                 page_text=page["text"],
                 image_base64=page["image_base64"],
@@ -374,8 +424,6 @@ async def create_chunks_from_blocks(
     """
     logger.info(f"Creating chunks from {len(blocks)} blocks")
 
-    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
     if mode == "page":
         # Group blocks by page
         pages = {}
@@ -408,7 +456,7 @@ async def create_chunks_from_blocks(
                 concepts, entities, relationships, and main ideas. Be
                 comprehensive but focused.
                 """
-                response = await client.chat.completions.create(
+                response = await openai_client.chat.completions.create(
                     model="gpt-4.1-mini-2025-04-14",
                     messages=[
                         {"role": "system", "content": prompt},
@@ -453,24 +501,25 @@ async def create_chunks_from_blocks(
 
 
 async def parse_pdf(
-    pdf_bytes: bytes, chunking_mode: Literal["page", "block"] = "page"
+    source: Union[bytes, str], chunking_mode: Literal["page", "block"] = "page"
 ) -> ParsedDocument:
     """
     Parse a PDF document into structured content asynchronously.
 
     Args:
-        pdf_bytes: The raw PDF bytes to parse
+        source: The raw PDF bytes to parse, or a path to the PDF on disk.
+            Prefer a path for files already on disk; only the path is sent
+            to the worker process.
 
     Returns:
         A ParsedDocument containing the hierarchical structure of document content
     """
     logger.info("Starting async PDF parsing process")
     try:
-        # Load the document from bytes
-        document = await load_pdf(pdf_bytes)
-
-        # Extract text and images from each page
-        page_data = await extract_page_data(document)
+        # Load the document and extract text and images from each page in a
+        # worker process (or the default thread pool if none was started)
+        loop = asyncio.get_running_loop()
+        page_data = await loop.run_in_executor(parse_pool, load_pdf_page_data, source)
 
         # Use OpenAI to analyze the content and identify blocks asynchronously
         blocks = await analyze_with_openai(page_data)
@@ -1,7 +1,14 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from backend.document_parser import start_parse_pool, shutdown_parse_pool
 from backend.routers.users import router as users_router
 from backend.routers.auth import router as auth_router
-from backend.routers.file import router as file_router
+from backend.routers.file import (
+    router as file_router,
+    create_upload_dirs,
+    sweep_unindexed_files,
+)
 from backend.routers.chat import router as chat_router
 from backend.routers.ws import router as ws_router
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,7 +18,18 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await create_upload_dirs()
+    start_parse_pool()
+    # Resume indexing that failed or was interrupted, here or in another process
+    index_sweeper = asyncio.create_task(sweep_unindexed_files())
+    yield
+    index_sweeper.cancel()
+    shutdown_parse_pool()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1,16 +1,17 @@
-from sqlalchemy import JSON, DateTime, String, ForeignKey, Integer, Boolean
+from sqlalchemy import JSON, DateTime, String, ForeignKey, Index, Integer, Boolean
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from backend.database import Base
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 import datetime
+from uuid_extensions import uuid7
 
 
 class User(Base):
     __tablename__ = "users"
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, index=True, default=uuid7
     )
     name: Mapped[str] = mapped_column(String, nullable=False, index=True)
     email: Mapped[str] = mapped_column(String, index=True, nullable=False)
@@ -21,9 +22,10 @@ class User(Base):
 
 class File(Base):
     __tablename__ = "files"
+    __table_args__ = (Index("ix_files_user_id_id", "user_id", "id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid7
     )
     name: Mapped[str] = mapped_column(String, nullable=False)
     user_id: Mapped[uuid.UUID] = mapped_column(
@@ -32,15 +34,34 @@ class File(Base):
     name: Mapped[str] = mapped_column(String, nullable=False)
     content_type: Mapped[str] = mapped_column(String, nullable=False)
     size: Mapped[int] = mapped_column(Integer, nullable=False)
+    hash: Mapped[str] = mapped_column(String, nullable=True, index=True)
     is_indexed: Mapped[bool] = mapped_column(Boolean, nullable=True, default=False)
+    index_status: Mapped[str] = mapped_column(String, nullable=True)
+    index_attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    index_claimed_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=True)
     user: Mapped["User"] = relationship(back_populates="files")
 
 
+class FileChunk(Base):
+    __tablename__ = "file_chunks"
+
+    file_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("files.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    chunk_idx: Mapped[int] = mapped_column(Integer, primary_key=True)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    embedding_id: Mapped[str] = mapped_column(String, nullable=False)
+
+
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid7
     )
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id")
@@ -60,7 +81,7 @@ class ChatMessage(Base):
     __tablename__ = "chat_messages"
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid7
     )
     session_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("chat_sessions.id")
@@ -2,6 +2,7 @@ import datetime
 import uuid
 from typing import Annotated, Any, List
 from fastapi import APIRouter, Depends
+from sqlalchemy import insert
 from backend.models import ChatMessage, ChatSession
 from backend.database import db_dependency
 from backend.routers.auth import get_current_user_from_cookie
@@ -23,6 +24,17 @@ async def save_message(
     return message
 
 
+async def bulk_insert_messages(
+    db: db_dependency,
+    rows: list[dict[str, Any]],
+):
+    """Insert many chat messages with a single multi-row INSERT"""
+    if not rows:
+        return
+    db.execute(insert(ChatMessage), rows)
+    db.commit()
+
+
 async def list_session_messages(
     session_id: uuid.UUID,
     db: db_dependency,
@@ -1,9 +1,16 @@
+import asyncio
+import datetime
+import logging
 import os
 from typing import Annotated
 import uuid
-from backend.database import db_dependency, SessionLocal
-from backend.document_parser import parse_pdf
-from backend.models import File, User
+import aiofiles
+import aiofiles.os
+from blake3 import blake3
+from uuid_extensions import uuid7
+from backend.database import db_dependency, AsyncSessionLocal
+from backend.document_parser import ParsedDocument, parse_pdf
+from backend.models import File, FileChunk, User
 from fastapi import (
     APIRouter,
     Depends,
@@ -14,20 +21,52 @@ from fastapi import (
 )
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
+from sqlalchemy import exists, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 
 from backend.routers.auth import get_current_user_from_cookie
-from backend.chroma import add_file_to_chromadb, delete_file_from_chromadb
+from backend.chroma import (
+    EMBEDDING_BATCH_SIZE,
+    add_file_to_chromadb,
+    delete_file_from_chromadb,
+)
 
 
-UPLOAD_DIR = "files"
+logger = logging.getLogger(__name__)
 
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+UPLOAD_DIR = "files"
+PARSED_DIR = os.path.join(UPLOAD_DIR, "parsed")
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+INDEX_SEMAPHORE = asyncio.Semaphore(4)
+# In-flight parses by cache key
+PARSE_TASKS: dict[str, asyncio.Task] = {}
+# Indexing tasks restarted by the sweeper, referenced so they aren't collected
+RESUME_TASKS: set[asyncio.Task] = set()
+CHUNK_STATUS_EMBEDDED = "embedded"
+INDEX_STATUS_INDEXING = "indexing"
+INDEX_STATUS_INDEXED = "indexed"
+INDEX_STATUS_FAILED = "failed"
+# Indexing attempts per file before giving up on it
+MAX_INDEX_ATTEMPTS = 3
+# How long an indexing claim lasts without a heartbeat before it is taken over
+INDEX_CLAIM_TIMEOUT = datetime.timedelta(minutes=5)
+# Seconds between refreshes of a live indexing claim
+INDEX_HEARTBEAT_INTERVAL = 60
+# Seconds between sweeps for stalled or failed indexing
+INDEX_SWEEP_INTERVAL = 60
 
 
 router = APIRouter(prefix="/files", tags=["files"])
 
 
+async def create_upload_dirs():
+    """Create the directories uploaded files and parse results are stored in"""
+    await aiofiles.os.makedirs(UPLOAD_DIR, exist_ok=True)
+    await aiofiles.os.makedirs(PARSED_DIR, exist_ok=True)
+
+
 class FileMetadataResponse(BaseModel):
     id: uuid.UUID
     name: str
@@ -36,31 +75,216 @@ class FileMetadataResponse(BaseModel):
     is_indexed: bool | None
 
 
-async def index_file_in_background(file: File, file_path: str):
+async def parse_and_cache_document(file_path: str, cache_path: str) -> ParsedDocument:
+    """Parse a PDF file and store the result at cache_path"""
+    parsed_document = await parse_pdf(
+        file_path
+    )  # HOMEWORK: Try and compare page-level chunks vs. block-level chunks
+
+    # Write to a temp file first so readers never see a partial cache entry
+    tmp_path = f"{cache_path}.{uuid.uuid4()}.tmp"
+    async with aiofiles.open(tmp_path, "w") as f:
+        await f.write(parsed_document.model_dump_json())
+    await aiofiles.os.replace(tmp_path, cache_path)
+
+    return parsed_document
+
+
+async def get_parsed_document(file: File, file_path: str) -> ParsedDocument:
+    """
+    Parse a PDF file once and share the result between the indexer and
+    parse_file. Results are cached on disk by content hash (or by file id for
+    files uploaded before hashes were recorded), and concurrent callers for the
+    same content wait on a single in-flight parse.
+    """
+    cache_key = file.hash or str(file.id)
+    cache_path = os.path.join(PARSED_DIR, f"{cache_key}.json")
+
+    if await aiofiles.os.path.exists(cache_path):
+        async with aiofiles.open(cache_path, "r") as f:
+            return ParsedDocument.model_validate_json(await f.read())
+
+    task = PARSE_TASKS.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(parse_and_cache_document(file_path, cache_path))
+        PARSE_TASKS[cache_key] = task
+        task.add_done_callback(lambda _: PARSE_TASKS.pop(cache_key, None))
+
+    # Shield the shared parse so one caller disconnecting doesn't cancel it
+    return await asyncio.shield(task)
+
+
+async def heartbeat_index_claim(file_id: uuid.UUID):
+    """Keep a file's indexing claim fresh so the sweeper doesn't take it over"""
+    while True:
+        await asyncio.sleep(INDEX_HEARTBEAT_INTERVAL)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(File)
+                    .where(
+                        File.id == file_id,
+                        File.index_status == INDEX_STATUS_INDEXING,
+                    )
+                    .values(index_claimed_at=datetime.datetime.now())
+                )
+                await db.commit()
+        except Exception:
+            logger.exception(f"Error refreshing indexing claim for file {file_id}")
+
+
+async def index_file_in_background(file_id: uuid.UUID, file_path: str):
     """Background task to index a file in ChromaDB"""
+    # Refresh the claim while queued and parsing, not just between batches
+    heartbeat = asyncio.create_task(heartbeat_index_claim(file_id))
     try:
-        # Add file to ChromaDB
-        await add_file_to_chromadb(
-            file=file,
-            file_path=file_path,
-        )
+        await index_file(file_id, file_path)
+    finally:
+        heartbeat.cancel()
+
 
-        # Mark the file as indexed in the database
-        db = SessionLocal()
+async def index_file(file_id: uuid.UUID, file_path: str):
+    """Parse a file and embed whatever chunks aren't checkpointed yet"""
+    # Limit how many files are parsed and embedded at once
+    async with INDEX_SEMAPHORE:
         try:
-            db_file = db.query(File).filter(File.id == file.id).first()
-            if db_file:
-                db_file.is_indexed = True
-                db.commit()
-        except Exception as e:
-            db.rollback()
-            print(f"Error updating file indexed status: {str(e)}")
-        finally:
-            db.close()
+            # Read what the indexer needs up front and release the connection;
+            # parsing and embedding take minutes and must not hold a transaction
+            async with AsyncSessionLocal() as db:
+                file = await db.get(File, file_id)
+                if not file:
+                    return
+
+                # Skip chunks embedded by an earlier, interrupted run
+                embedded = set(
+                    await db.scalars(
+                        select(FileChunk.chunk_idx).where(
+                            FileChunk.file_id == file_id,
+                            FileChunk.status == CHUNK_STATUS_EMBEDDED,
+                        )
+                    )
+                )
+
+            # Parse the document into chunks
+            chunks = []
+            if file.content_type == "application/pdf":
+                parsed = await get_parsed_document(file, file_path)
+                chunks = parsed.chunks
+            # For non-PDF files, we can add support later
+
+            pending = [i for i in range(len(chunks)) if i not in embedded]
+
+            # Add file to ChromaDB, checkpointing after each batch
+            for start in range(0, len(pending), EMBEDDING_BATCH_SIZE):
+                batch = pending[start : start + EMBEDDING_BATCH_SIZE]
+                embedding_ids = await add_file_to_chromadb(
+                    file=file,
+                    chunks=[chunks[i] for i in batch],
+                    chunk_indices=batch,
+                )
+                rows = [
+                    {
+                        "file_id": file_id,
+                        "chunk_idx": chunk_idx,
+                        "status": CHUNK_STATUS_EMBEDDED,
+                        "embedding_id": embedding_id,
+                    }
+                    for chunk_idx, embedding_id in zip(batch, embedding_ids)
+                ]
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        pg_insert(FileChunk).values(rows).on_conflict_do_nothing()
+                    )
+                    # The checkpoint doubles as a heartbeat for the claim
+                    await db.execute(
+                        update(File)
+                        .where(File.id == file_id)
+                        .values(index_claimed_at=datetime.datetime.now())
+                    )
+                    await db.commit()
+
+            # Mark the file as indexed in the database
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(File)
+                    .where(File.id == file_id)
+                    .values(is_indexed=True, index_status=INDEX_STATUS_INDEXED)
+                )
+                await db.commit()
+        except Exception:
+            # Log the error but continue - background task shouldn't fail
+            logger.exception(f"Error indexing file {file_id} in background")
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(File)
+                        .where(File.id == file_id)
+                        .values(index_status=INDEX_STATUS_FAILED)
+                    )
+                    await db.commit()
+            except Exception:
+                logger.exception(f"Error marking file {file_id} as failed")
+
+
+async def resume_unindexed_files():
+    """
+    Restart indexing for files whose background task failed or didn't finish.
+
+    Files are claimed in the database first, so when several processes sweep
+    at once each file is resumed by only one of them. A claim is only taken
+    over once its heartbeat is older than INDEX_CLAIM_TIMEOUT, which also
+    spaces out retries of failed files. Files that have already used up
+    MAX_INDEX_ATTEMPTS are left alone.
+    """
+    now = datetime.datetime.now()
+    claimable = (
+        select(File.id)
+        .where(
+            File.is_indexed.is_(False),
+            File.index_attempts < MAX_INDEX_ATTEMPTS,
+            or_(
+                File.index_claimed_at.is_(None),
+                File.index_claimed_at < now - INDEX_CLAIM_TIMEOUT,
+            ),
+        )
+        .with_for_update(skip_locked=True)
+    )
+    try:
+        async with AsyncSessionLocal() as db:
+            file_ids = (
+                await db.scalars(
+                    update(File)
+                    .where(File.id.in_(claimable.scalar_subquery()))
+                    .values(
+                        index_status=INDEX_STATUS_INDEXING,
+                        index_attempts=File.index_attempts + 1,
+                        index_claimed_at=now,
+                    )
+                    .returning(File.id)
+                    .execution_options(synchronize_session=False)
+                )
+            ).all()
+            await db.commit()
+    except Exception:
+        logger.exception("Error claiming files to resume indexing")
+        return
+
+    for file_id in file_ids:
+        task = asyncio.create_task(
+            index_file_in_background(
+                file_id=file_id,
+                file_path=os.path.join(UPLOAD_DIR, str(file_id)),
+            )
+        )
+        RESUME_TASKS.add(task)
+        task.add_done_callback(RESUME_TASKS.discard)
 
-    except Exception as e:
-        # Log the error but continue - background task shouldn't fail
-        print(f"Error adding file to ChromaDB in background: {str(e)}")
+
+async def sweep_unindexed_files():
+    """Periodically resume indexing that failed or whose process went away"""
+    while True:
+        await resume_unindexed_files()
+        await asyncio.sleep(INDEX_SWEEP_INTERVAL)
 
 
 @router.get("", response_model=list[FileMetadataResponse])
@@ -68,8 +292,13 @@ async def list_files(
     current_user: Annotated[User, Depends(get_current_user_from_cookie)],
     db: db_dependency,
 ):
-    files = db.query(File).filter(File.user_id == current_user.id).all()
-    return files
+    # Select only the response columns to skip ORM object hydration; the
+    # response_model validates the plain row mappings once
+    stmt = select(
+        File.id, File.name, File.content_type, File.size, File.is_indexed
+    ).where(File.user_id == current_user.id)
+    rows = db.execute(stmt).all()
+    return [row._mapping for row in rows]
 
 
 @router.post(
@@ -83,35 +312,56 @@ async def upload_file(
     current_user: Annotated[User, Depends(get_current_user_from_cookie)],
     db: db_dependency,
 ):
+    new_file_id = uuid7()
+    file_path = os.path.join(UPLOAD_DIR, str(new_file_id))
+
     try:
-        content = await file.read()
+        # Stream the upload to disk in fixed-size chunks to keep memory flat
+        size = 0
+        hasher = blake3(max_threads=blake3.AUTO)
+        async with aiofiles.open(file_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await out.write(chunk)
+                size += len(chunk)
+                hasher.update(chunk)
 
         new_file = File(
+            id=new_file_id,
             user_id=current_user.id,
             name=file.filename,
             content_type=file.content_type,
-            size=len(content),
+            size=size,
+            hash=hasher.hexdigest(),
             is_indexed=False,
+            # Claimed by the background task scheduled below
+            index_status=INDEX_STATUS_INDEXING,
+            index_attempts=1,
+            index_claimed_at=datetime.datetime.now(),
         )
 
         db.add(new_file)
         db.commit()
-        db.refresh(new_file)
-
-        file_path = os.path.join(UPLOAD_DIR, str(new_file.id))
-        with open(file_path, "wb") as f:
-            f.write(content)
 
         # Schedule ChromaDB indexing as a background task
         background_tasks.add_task(
             index_file_in_background,
-            file=new_file,
+            file_id=new_file_id,
             file_path=file_path,
         )
 
-        return new_file
+        # All columns are set client-side, so respond with the known values
+        # rather than reloading the row expired by the commit
+        return FileMetadataResponse(
+            id=new_file_id,
+            name=file.filename,
+            content_type=file.content_type,
+            size=size,
+            is_indexed=False,
+        )
     except SQLAlchemyError:
         db.rollback()
+        if await aiofiles.os.path.exists(file_path):
+            await aiofiles.os.unlink(file_path)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create file record",
@@ -120,6 +370,8 @@ async def upload_file(
         if "new_file" in locals() and new_file.id:
             db.delete(new_file)
             db.commit()
+        if await aiofiles.os.path.exists(file_path):
+            await aiofiles.os.unlink(file_path)
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -133,7 +385,7 @@ async def download_file(
     current_user: Annotated[User, Depends(get_current_user_from_cookie)],
     db: db_dependency,
 ):
-    file = db.query(File).filter(File.id == file_id).first()
+    file = db.get(File, file_id)
 
     if not file:
         raise HTTPException(
@@ -147,14 +399,20 @@ async def download_file(
         )
 
     file_path = os.path.join(UPLOAD_DIR, str(file_id))
-    if not os.path.exists(file_path):
+    try:
+        # Reuse this stat for the response headers instead of stat-ing again
+        stat_result = await aiofiles.os.stat(file_path)
+    except FileNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File content not found",
         )
 
     return FileResponse(
-        path=file_path, media_type=file.content_type, filename=file.name
+        path=file_path,
+        media_type=file.content_type,
+        filename=file.name,
+        stat_result=stat_result,
     )
 
 
@@ -164,7 +422,7 @@ async def delete_file(
     current_user: Annotated[User, Depends(get_current_user_from_cookie)],
     db: db_dependency,
 ):
-    file = db.query(File).filter(File.id == file_id).first()
+    file = db.get(File, file_id)
 
     if not file:
         raise HTTPException(
@@ -177,15 +435,28 @@ async def delete_file(
             detail="Not authorized to access this file",
         )
 
+    file_hash = file.hash
+
     try:
         db.delete(file)
         db.commit()
 
         file_path = os.path.join(UPLOAD_DIR, str(file_id))
-        if os.path.exists(file_path):
-            os.remove(file_path)
-
-        await delete_file_from_chromadb(file_id)
+        if await aiofiles.os.path.exists(file_path):
+            await aiofiles.os.remove(file_path)
+
+        # Parse results keyed by hash are shared by every file with the same
+        # content, so only remove them once the last such file is gone
+        cache_key = file_hash or str(file_id)
+        if file_hash:
+            still_used = db.scalar(select(exists().where(File.hash == file_hash)))
+        else:
+            still_used = False
+        cache_path = os.path.join(PARSED_DIR, f"{cache_key}.json")
+        if not still_used and await aiofiles.os.path.exists(cache_path):
+            await aiofiles.os.remove(cache_path)
+
+        await delete_file_from_chromadb(file_id, current_user.id)
 
         return None
 
@@ -203,7 +474,7 @@ async def parse_file(
     current_user: Annotated[User, Depends(get_current_user_from_cookie)],
     db: db_dependency,
 ):
-    file = db.query(File).filter(File.id == file_id).first()
+    file = db.get(File, file_id)
 
     if not file:
         raise HTTPException(
@@ -217,15 +488,12 @@ async def parse_file(
         )
 
     file_path = os.path.join(UPLOAD_DIR, str(file_id))
-    if not os.path.exists(file_path):
+    if not await aiofiles.os.path.exists(file_path):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File content not found",
         )
 
-    with open(file_path, "rb") as f:
-        pdf_bytes = f.read()
-
-    parsed_document = await parse_pdf(pdf_bytes)
+    parsed_document = await get_parsed_document(file, file_path)
 
     return parsed_document
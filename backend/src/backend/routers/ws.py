@@ -1,9 +1,14 @@
 import asyncio
+import datetime
 import json
 import os
 import uuid
 from agents import Agent, ModelSettings, Runner, function_tool
-from backend.routers.chat import list_session_messages, save_message
+from backend.routers.chat import (
+    bulk_insert_messages,
+    list_session_messages,
+    save_message,
+)
 import jwt
 from typing import Annotated, Any
 from fastapi import (
@@ -21,12 +26,17 @@ from backend.models import ChatMessage, User
 from backend.chroma import search_vector_db
 from openai import AsyncOpenAI
 from openai.types.shared import Reasoning
+from uuid_extensions import uuid7
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ws", tags=["websocket"])
 
+# Streamed items that are saved together with the item that follows them
+BUFFERED_ITEM_TYPES = {"reasoning", "function_call"}
+MAX_PENDING_MESSAGES = 16
+
 
 openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
@@ -185,12 +195,39 @@ async def websocket_endpoint(
 
                 result = Runner.run_streamed(agent, input=input_items)
                 new_input_items = []
-                async for event in result.stream_events():
-                    if event.type == "run_item_stream_event":
-                        item = event.item.to_input_item()
-                        new_input_items.append(item)
-                        chat_message = await save_message(session_id, item, db)
-                        await manager.send_message(chat_message, websocket)
+                pending_rows = []
+                try:
+                    async for event in result.stream_events():
+                        if event.type == "run_item_stream_event":
+                            item = event.item.to_input_item()
+                            new_input_items.append(item)
+                            row = {
+                                "id": uuid7(),
+                                "session_id": session_id,
+                                "content": item,
+                                "created_at": datetime.datetime.now(),
+                            }
+                            pending_rows.append(row)
+                            await manager.send_message(ChatMessage(**row), websocket)
+
+                            # Hold reasoning and tool calls until the item that
+                            # completes them arrives, then save them together
+                            if (
+                                item.get("type") not in BUFFERED_ITEM_TYPES
+                                or len(pending_rows) >= MAX_PENDING_MESSAGES
+                            ):
+                                await bulk_insert_messages(db, pending_rows)
+                                pending_rows = []
+                except BaseException:
+                    # Save what the client has already seen without masking
+                    # the original error
+                    try:
+                        await bulk_insert_messages(db, pending_rows)
+                    except Exception:
+                        db.rollback()
+                        logger.exception("Error saving streamed messages")
+                    raise
+                await bulk_insert_messages(db, pending_rows)
 
                 input_items += new_input_items
 